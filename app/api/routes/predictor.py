@@ -1,9 +1,16 @@
+import asyncio
 import json
 from pathlib import Path
 
 import joblib
-from core.config import INPUT_EXAMPLE
-from fastapi import APIRouter, HTTPException
+import numpy as np
+from core.config import INPUT_EXAMPLE, STREAM_MAX_BATCH_ROWS, STREAM_QUEUE_SIZE
+from core.errors import (
+    FrameTooLargeException,
+    ModelLoadException,
+    PredictException,
+)
+from fastapi import APIRouter, HTTPException, WebSocket, WebSocketDisconnect, status
 from fastapi.concurrency import run_in_threadpool
 from loguru import logger
 from db import SessionLocal
@@ -17,6 +24,10 @@ from services.predict import MachineLearningModelHandlerScore as model
 
 router = APIRouter()
 
+N_FEATURES = len(MachineLearningDataInput.model_fields)
+FRAME_DTYPE = np.dtype("<f8")
+MAX_CLOSE_REASON_BYTES = 123
+
 
 def get_prediction(data_point):
     return model.predict(data_point, load_wrapper=joblib.load, method="predict")
@@ -80,3 +91,115 @@ async def health():
         return HealthResponse(status=True)
     except Exception:
         raise HTTPException(status_code=404, detail="Unhealthy")
+
+
+def decode_frame(payload):
+    """
+    Decode a binary frame of little-endian float64 values into a
+    (rows, N_FEATURES) array, without copying the payload
+    """
+    row_size = FRAME_DTYPE.itemsize * N_FEATURES
+    if not payload or len(payload) % row_size:
+        raise ValueError(f"frame size must be a non-zero multiple of {row_size} bytes")
+    return np.frombuffer(payload, dtype=FRAME_DTYPE).reshape(-1, N_FEATURES)
+
+
+def encode_predictions(predictions):
+    return np.asarray(predictions, dtype=FRAME_DTYPE).ravel().tobytes()
+
+
+def score_frames(frames):
+    """
+    Score several frames with a single model call and split the
+    predictions back per frame, preserving their order
+    """
+    batch = frames[0] if len(frames) == 1 else np.concatenate(frames)
+    predictions = np.asarray(get_prediction(batch), dtype=FRAME_DTYPE).ravel()
+    if len(predictions) != len(batch):
+        raise PredictException(
+            f"model returned {len(predictions)} predictions for {len(batch)} rows"
+        )
+    return np.split(predictions, np.cumsum([len(frame) for frame in frames])[:-1])
+
+
+async def receive_frames(websocket: WebSocket, queue: asyncio.Queue):
+    """
+    Push decoded frames to the bounded queue. Once the queue is full the
+    socket is no longer read, so backpressure reaches the client through TCP.
+    Frames are capped at STREAM_MAX_BATCH_ROWS rows so the queue stays bounded
+    in memory too. A decoding error is queued in place of a frame; None marks
+    the end.
+    """
+    while True:
+        message = await websocket.receive()
+        if message["type"] == "websocket.disconnect":
+            await queue.put(None)
+            return
+        try:
+            frame = decode_frame(message.get("bytes"))
+            if len(frame) > STREAM_MAX_BATCH_ROWS:
+                raise FrameTooLargeException(
+                    f"frame has {len(frame)} rows, limit is {STREAM_MAX_BATCH_ROWS}"
+                )
+        except ValueError as err:
+            await queue.put(err)
+            return
+        await queue.put(frame)
+
+
+def close_reason(message):
+    """
+    Cut a close reason to the 123 bytes the WebSocket protocol allows
+    """
+    encoded = str(message).encode()[:MAX_CLOSE_REASON_BYTES]
+    return encoded.decode(errors="ignore")
+
+
+async def next_batch(queue: asyncio.Queue):
+    """
+    Wait for a frame, then coalesce the frames already queued behind it up to
+    STREAM_MAX_BATCH_ROWS rows. Returns the frames, whether the stream ended
+    and the end marker (None on disconnect, the decoding error otherwise).
+    """
+    frames = []
+    rows = 0
+    item = await queue.get()
+    while isinstance(item, np.ndarray):
+        frames.append(item)
+        rows += len(item)
+        if rows >= STREAM_MAX_BATCH_ROWS or queue.empty():
+            return frames, False, None
+        item = queue.get_nowait()
+    return frames, True, item
+
+
+@router.websocket("/stream", name="predict:stream")
+async def stream(websocket: WebSocket):
+    await websocket.accept()
+    queue = asyncio.Queue(maxsize=STREAM_QUEUE_SIZE)
+    receiver = asyncio.create_task(receive_frames(websocket, queue))
+    try:
+        while True:
+            frames, ended, error = await next_batch(queue)
+            if ended and error is None:
+                return
+            if frames:
+                for predictions in await run_in_threadpool(score_frames, frames):
+                    await websocket.send_bytes(encode_predictions(predictions))
+            if ended:
+                if isinstance(error, FrameTooLargeException):
+                    code = status.WS_1009_MESSAGE_TOO_BIG
+                else:
+                    code = status.WS_1003_UNSUPPORTED_DATA
+                await websocket.close(code=code, reason=close_reason(error))
+                return
+    except WebSocketDisconnect:
+        pass
+    except (Exception, PredictException, ModelLoadException) as err:
+        logger.exception("stream scoring failed")
+        await websocket.close(
+            code=status.WS_1011_INTERNAL_ERROR,
+            reason=close_reason(f"Exception: {err}"),
+        )
+    finally:
+        receiver.cancel()
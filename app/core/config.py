@@ -29,3 +29,6 @@ logger.configure(handlers=[{"sink": sys.stderr, "level": LOGGING_LEVEL}])
 MODEL_PATH = config("MODEL_PATH", default="./ml/model/")
 MODEL_NAME = config("MODEL_NAME", default="model.pkl")
 INPUT_EXAMPLE = config("INPUT_EXAMPLE", default="./ml/model/examples/example.json")
+
+STREAM_MAX_BATCH_ROWS: int = config("STREAM_MAX_BATCH_ROWS", cast=int, default=4096)
+STREAM_QUEUE_SIZE: int = config("STREAM_QUEUE_SIZE", cast=int, default=64)
@@ -2,3 +2,6 @@ class PredictException(BaseException): ...
 
 
 class ModelLoadException(BaseException): ...
+
+
+class FrameTooLargeException(ValueError): ...
@@ -0,0 +1,168 @@
+# -*- coding: utf-8 -*-
+import json
+import os
+from collections import Counter
+from multiprocessing import Pool
+from pathlib import Path
+from urllib.parse import quote
+
+import click
+import joblib
+import pandas as pd
+import pyarrow.parquet as pq
+from loguru import logger
+from dotenv import find_dotenv, load_dotenv
+
+from models.prediction import MachineLearningDataInput
+from services.predict import MachineLearningModelHandlerScore
+
+FEATURES = list(MachineLearningDataInput.model_fields)
+SUFFIXES = (".csv", ".parquet")
+SUCCESS_MARKER = "_SUCCESS"
+MANIFEST = "_manifest.json"
+
+
+def init_worker():
+    """
+    In order to load model on memory to each worker
+    """
+    MachineLearningModelHandlerScore.get_model(joblib.load)
+
+
+def list_input_files(input_filepath):
+    path = Path(input_filepath)
+    if path.is_file():
+        return [path]
+    return sorted(p for p in path.rglob("*") if p.suffix in SUFFIXES)
+
+
+def partition_dir(source, input_filepath, output_filepath):
+    """
+    Name the partition after the source path relative to the input, so files
+    sharing a name in different directories or formats never collide
+    """
+    root = Path(input_filepath)
+    relative = source.relative_to(root.parent if root.is_file() else root)
+    return Path(output_filepath) / f"source={quote(relative.as_posix(), safe='')}"
+
+
+def check_manifest(output_dir, chunksize):
+    """
+    Record the chunksize a CSV source is split with, and refuse to resume it
+    with another one, since its existing parts would cover other rows
+    """
+    manifest = output_dir / MANIFEST
+    if manifest.exists():
+        recorded = json.loads(manifest.read_text())["chunksize"]
+        if recorded != chunksize:
+            raise click.UsageError(
+                f"{output_dir} was scored with --chunksize {recorded}, "
+                f"rerun with it or remove the partition to restart."
+            )
+        return
+    output_dir.mkdir(parents=True, exist_ok=True)
+    manifest.write_text(json.dumps({"chunksize": chunksize}))
+
+
+def list_tasks(files, input_filepath, output_filepath, chunksize):
+    """
+    Split the input files into units of work: one per Parquet row group and
+    one per CSV file. Files whose partition is already complete are skipped.
+    """
+    tasks = []
+    for source in files:
+        output_dir = partition_dir(source, input_filepath, output_filepath)
+        if (output_dir / SUCCESS_MARKER).exists():
+            logger.info(f"Skip {source}, already scored.")
+            continue
+        if source.suffix == ".parquet":
+            num_row_groups = pq.ParquetFile(source).num_row_groups
+            tasks.extend((source, output_dir, i) for i in range(num_row_groups))
+        else:
+            check_manifest(output_dir, chunksize)
+            tasks.append((source, output_dir, None))
+    return tasks
+
+
+def score_chunk(chunk, part_path):
+    """
+    Score a chunk and write it atomically, so an interrupted run never
+    leaves a partial part behind
+    """
+    # one fixed schema for every part, whatever types each chunk inferred
+    chunk = chunk.astype({feature: "float64" for feature in FEATURES})
+    predictions = MachineLearningModelHandlerScore.predict(
+        chunk[FEATURES].to_numpy(), load_wrapper=joblib.load
+    )
+    tmp_path = part_path.with_name(f".{part_path.name}.tmp")
+    chunk.assign(prediction=predictions).to_parquet(tmp_path, index=False)
+    os.replace(tmp_path, part_path)
+    return len(chunk)
+
+
+def score_task(task, chunksize):
+    source, output_dir, row_group = task
+    output_dir.mkdir(parents=True, exist_ok=True)
+    rows = 0
+    if row_group is not None:
+        part_path = output_dir / f"part-{row_group:05d}.parquet"
+        if not part_path.exists():
+            chunk = pq.ParquetFile(source).read_row_group(row_group).to_pandas()
+            rows += score_chunk(chunk, part_path)
+        return source, rows
+    for i, chunk in enumerate(pd.read_csv(source, chunksize=chunksize)):
+        part_path = output_dir / f"part-{i:05d}.parquet"
+        if not part_path.exists():
+            rows += score_chunk(chunk, part_path)
+    return source, rows
+
+
+def _score_task(args):
+    return score_task(*args)
+
+
+def pipeline(input_filepath, output_filepath, chunksize, processes):
+    logger.info("Start batch scoring.")
+    # fail fast: a pool initializer that raises is restarted forever, and
+    # workers forked from here inherit the loaded model
+    MachineLearningModelHandlerScore.get_model(joblib.load)
+    files = list_input_files(input_filepath)
+    tasks = list_tasks(files, input_filepath, output_filepath, chunksize)
+    output_dirs = {source: output_dir for source, output_dir, _ in tasks}
+    pending = Counter(source for source, _, _ in tasks)
+
+    with Pool(processes=processes, initializer=init_worker) as pool:
+        results = pool.imap_unordered(
+            _score_task, [(task, chunksize) for task in tasks]
+        )
+        for source, rows in results:
+            logger.info(f"Scored {rows} rows from {source}.")
+            pending[source] -= 1
+            if not pending[source]:
+                (output_dirs[source] / SUCCESS_MARKER).touch()
+
+
+@click.command()
+@click.argument(
+    "input_filepath", default="data/processed", type=click.Path(exists=True)
+)
+@click.argument("output_filepath", default="data/predictions", type=click.Path())
+@click.option(
+    "--chunksize", default=100_000, show_default=True, help="CSV rows per part."
+)
+@click.option("--processes", default=None, type=int, help="Worker processes.")
+def main(input_filepath, output_filepath, chunksize, processes):
+    """Scores CSV/Parquet files from (../processed) with the serving model and
+    writes predictions as Parquet partitioned by source file (saved in
+    ../predictions). Re-running resumes from the parts already written.
+    """
+    logger.info(f"Read from {input_filepath}, write to {output_filepath}.")
+    pipeline(input_filepath, output_filepath, chunksize, processes)
+
+
+if __name__ == "__main__":
+
+    load_dotenv(find_dotenv())
+
+    # pylint: disable = no-value-for-paramete
+    main()
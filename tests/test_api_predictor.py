@@ -1,5 +1,8 @@
+import asyncio
 import json
+import numpy as np
 import pytest
+from fastapi import WebSocketDisconnect
 from fastapi.testclient import TestClient
 
 from main import get_application
@@ -63,3 +66,104 @@ def test_health_endpoint_failure(client, monkeypatch):
     monkeypatch.setattr(predictor, "INPUT_EXAMPLE", "missing.json")
     response = client.get("/api/v1/health")
     assert response.status_code == 404
+
+
+def test_stream_endpoint_scores_frames_in_order(client, monkeypatch):
+    monkeypatch.setattr(predictor, "get_prediction", lambda data: data[:, 0] * 10)
+    first = np.arange(10, dtype="<f8").reshape(2, 5)
+    second = np.arange(10, 25, dtype="<f8").reshape(3, 5)
+    with client.websocket_connect("/api/v1/stream") as websocket:
+        websocket.send_bytes(first.tobytes())
+        websocket.send_bytes(second.tobytes())
+        assert np.frombuffer(websocket.receive_bytes()).tolist() == [0.0, 50.0]
+        assert np.frombuffer(websocket.receive_bytes()).tolist() == [
+            100.0,
+            150.0,
+            200.0,
+        ]
+
+
+def test_stream_endpoint_rejects_malformed_frame(client, monkeypatch):
+    monkeypatch.setattr(predictor, "get_prediction", lambda data: data[:, 0])
+    with client.websocket_connect("/api/v1/stream") as websocket:
+        websocket.send_bytes(b"\x00" * 12)
+        with pytest.raises(WebSocketDisconnect) as exc_info:
+            websocket.receive_bytes()
+    assert exc_info.value.code == 1003
+
+
+def test_score_frames_splits_batch_per_frame(monkeypatch):
+    monkeypatch.setattr(predictor, "get_prediction", lambda data: data[:, 1])
+    frames = [np.ones((1, 5)), np.zeros((2, 5))]
+    results = predictor.score_frames(frames)
+    assert [r.tolist() for r in results] == [[1.0], [0.0, 0.0]]
+
+
+def test_stream_endpoint_closes_on_model_load_error(client, monkeypatch):
+    def raise_error(data):
+        raise predictor.ModelLoadException("x" * 500)
+
+    monkeypatch.setattr(predictor, "get_prediction", raise_error)
+    with client.websocket_connect("/api/v1/stream") as websocket:
+        websocket.send_bytes(np.ones((1, 5)).tobytes())
+        with pytest.raises(WebSocketDisconnect) as exc_info:
+            websocket.receive_bytes()
+    assert exc_info.value.code == 1011
+    assert len(exc_info.value.reason.encode()) <= 123
+
+
+def test_close_reason_truncates_on_character_boundary():
+    reason = predictor.close_reason("é" * 100)
+    assert len(reason.encode()) <= 123
+    assert reason == "é" * 61
+
+
+def test_stream_endpoint_rejects_oversized_frame(client, monkeypatch):
+    monkeypatch.setattr(predictor, "get_prediction", lambda data: data[:, 0])
+    monkeypatch.setattr(predictor, "STREAM_MAX_BATCH_ROWS", 2)
+    with client.websocket_connect("/api/v1/stream") as websocket:
+        websocket.send_bytes(np.ones((3, 5)).tobytes())
+        with pytest.raises(WebSocketDisconnect) as exc_info:
+            websocket.receive_bytes()
+    assert exc_info.value.code == 1009
+
+
+async def filled_queue(*items):
+    queue = asyncio.Queue()
+    for item in items:
+        queue.put_nowait(item)
+    return queue
+
+
+@pytest.mark.anyio
+async def test_next_batch_coalesces_queued_frames():
+    frames = [np.ones((1, 5)), np.ones((2, 5)), np.ones((1, 5))]
+    queue = await filled_queue(*frames)
+    batch, ended, error = await predictor.next_batch(queue)
+    assert [len(frame) for frame in batch] == [1, 2, 1]
+    assert (ended, error) == (False, None)
+    assert queue.empty()
+
+
+@pytest.mark.anyio
+async def test_next_batch_splits_at_row_cap(monkeypatch):
+    monkeypatch.setattr(predictor, "STREAM_MAX_BATCH_ROWS", 3)
+    queue = await filled_queue(np.ones((2, 5)), np.ones((2, 5)), np.ones((1, 5)))
+    first, ended, _ = await predictor.next_batch(queue)
+    second, _, _ = await predictor.next_batch(queue)
+    assert [len(frame) for frame in first] == [2, 2]
+    assert [len(frame) for frame in second] == [1]
+    assert ended is False
+
+
+@pytest.mark.anyio
+async def test_next_batch_returns_end_markers():
+    error = ValueError("bad frame")
+    queue = await filled_queue(np.ones((1, 5)), error)
+    batch, ended, marker = await predictor.next_batch(queue)
+    assert [len(frame) for frame in batch] == [1]
+    assert ended is True
+    assert marker is error
+
+    queue = await filled_queue(None)
+    assert await predictor.next_batch(queue) == ([], True, None)
@@ -0,0 +1,154 @@
+import click
+import joblib
+import pandas as pd
+import pytest
+
+import ml.scoring.batch_score as batch_score
+import services.predict as predict
+
+
+class DummyModel:
+    def predict(self, data):
+        return data[:, 0] * 2
+
+
+def sample_frame(rows):
+    return pd.DataFrame(
+        {feature: [float(i) for i in range(rows)] for feature in batch_score.FEATURES}
+    )
+
+
+@pytest.fixture(autouse=True)
+def dummy_model(monkeypatch):
+    monkeypatch.setattr(predict.MachineLearningModelHandlerScore, "model", DummyModel())
+
+
+def test_score_csv_in_chunks(tmp_path):
+    source = tmp_path / "input.csv"
+    sample_frame(5).to_csv(source, index=False)
+    output = tmp_path / "output"
+
+    [task] = batch_score.list_tasks([source], source, output, 2)
+    assert batch_score.score_task(task, chunksize=2) == (source, 5)
+
+    parts = sorted((output / "source=input.csv").glob("part-*.parquet"))
+    assert len(parts) == 3
+    result = pd.concat(pd.read_parquet(part) for part in parts)
+    assert result["prediction"].tolist() == [0.0, 2.0, 4.0, 6.0, 8.0]
+
+
+def test_csv_parts_share_one_schema(tmp_path):
+    source = tmp_path / "input.csv"
+    header = ",".join(batch_score.FEATURES)
+    rows = ["1,2,3,4,5"] * 2 + [",".join(["1.5"] * 5)] * 2 + ["1,2,3,4,5"] * 2
+    source.write_text("\n".join([header, *rows]) + "\n")
+    output = tmp_path / "output"
+
+    [task] = batch_score.list_tasks([source], source, output, 2)
+    batch_score.score_task(task, chunksize=2)
+
+    result = pd.read_parquet(output)
+    assert len(result) == 6
+    assert (result[batch_score.FEATURES].dtypes == "float64").all()
+
+
+def test_score_parquet_row_groups_resume(tmp_path):
+    source = tmp_path / "input.parquet"
+    sample_frame(4).to_parquet(source, index=False, row_group_size=2)
+    output = tmp_path / "output"
+
+    tasks = batch_score.list_tasks([source], source, output, 2)
+    assert [row_group for _, _, row_group in tasks] == [0, 1]
+    batch_score.score_task(tasks[0], chunksize=2)
+
+    assert batch_score.score_task(tasks[0], chunksize=2) == (source, 0)
+    assert batch_score.score_task(tasks[1], chunksize=2) == (source, 2)
+
+
+def test_list_tasks_skips_completed_source(tmp_path):
+    source = tmp_path / "input.csv"
+    sample_frame(1).to_csv(source, index=False)
+    output_dir = batch_score.partition_dir(source, tmp_path, tmp_path / "output")
+    output_dir.mkdir(parents=True)
+    (output_dir / batch_score.SUCCESS_MARKER).touch()
+
+    assert batch_score.list_tasks([source], tmp_path, tmp_path / "output", 2) == []
+
+
+def test_sources_sharing_a_stem_get_separate_partitions(tmp_path):
+    input_dir = tmp_path / "input"
+    for name in ("a/part-0.csv", "b/part-0.csv"):
+        (input_dir / name).parent.mkdir(parents=True)
+        sample_frame(2).to_csv(input_dir / name, index=False)
+    sample_frame(3).to_parquet(input_dir / "a" / "part-0.parquet", index=False)
+    output = tmp_path / "output"
+
+    files = batch_score.list_input_files(input_dir)
+    tasks = batch_score.list_tasks(files, input_dir, output, 10)
+    for task in tasks:
+        batch_score.score_task(task, chunksize=10)
+
+    partitions = sorted(p.name for p in output.iterdir())
+    assert partitions == [
+        "source=a%2Fpart-0.csv",
+        "source=a%2Fpart-0.parquet",
+        "source=b%2Fpart-0.csv",
+    ]
+    assert len(pd.read_parquet(output)) == 7
+
+
+def test_pipeline_fails_fast_without_model(tmp_path, monkeypatch):
+    source = tmp_path / "input.csv"
+    sample_frame(1).to_csv(source, index=False)
+    monkeypatch.setattr(predict, "MODEL_PATH", str(tmp_path))
+    monkeypatch.setattr(predict, "MODEL_NAME", "missing.pkl")
+    monkeypatch.setattr(predict.MachineLearningModelHandlerScore, "model", None)
+
+    with pytest.raises(FileNotFoundError):
+        batch_score.pipeline(source, tmp_path / "output", 2, 1)
+
+
+def test_csv_resume_refuses_different_chunksize(tmp_path):
+    source = tmp_path / "input.csv"
+    sample_frame(5).to_csv(source, index=False)
+    output = tmp_path / "output"
+
+    [task] = batch_score.list_tasks([source], source, output, 2)
+    batch_score.score_task(task, chunksize=2)
+
+    assert batch_score.list_tasks([source], source, output, 2) == [task]
+    with pytest.raises(click.UsageError):
+        batch_score.list_tasks([source], source, output, 3)
+
+
+def test_pipeline_scores_csv_and_parquet(tmp_path, monkeypatch):
+    joblib.dump(DummyModel(), tmp_path / "model.pkl")
+    monkeypatch.setattr(predict, "MODEL_PATH", str(tmp_path))
+    monkeypatch.setattr(predict, "MODEL_NAME", "model.pkl")
+    input_dir = tmp_path / "input"
+    input_dir.mkdir()
+    sample_frame(3).to_csv(input_dir / "a.csv", index=False)
+    sample_frame(4).to_parquet(input_dir / "b.parquet", row_group_size=2)
+    output = tmp_path / "output"
+
+    batch_score.pipeline(input_dir, output, 2, 1)
+
+    for partition in ("source=a.csv", "source=b.parquet"):
+        assert (output / partition / batch_score.SUCCESS_MARKER).exists()
+        parts = sorted((output / partition).glob("part-*.parquet"))
+        assert len(parts) == 2
+        result = pd.concat(pd.read_parquet(part) for part in parts)
+        assert sorted(result["prediction"]) == [2.0 * i for i in range(len(result))]
+
+
+def test_pipeline_loads_model_once_before_workers(tmp_path, monkeypatch):
+    joblib.dump(DummyModel(), tmp_path / "model.pkl")
+    monkeypatch.setattr(predict, "MODEL_PATH", str(tmp_path))
+    monkeypatch.setattr(predict, "MODEL_NAME", "model.pkl")
+    monkeypatch.setattr(predict.MachineLearningModelHandlerScore, "model", None)
+    source = tmp_path / "input.csv"
+    sample_frame(2).to_csv(source, index=False)
+
+    batch_score.pipeline(source, tmp_path / "output", 2, 1)
+
+    assert isinstance(predict.MachineLearningModelHandlerScore.model, DummyModel)